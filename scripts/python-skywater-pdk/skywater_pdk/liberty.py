@@ -19,16 +19,19 @@
 
 
 import argparse
+import collections
+import concurrent.futures
 import enum
+import functools
 import json
+import math
+import multiprocessing
 import os
 import pathlib
 import pprint
 import re
 import sys
 
-from collections import defaultdict
-
 from typing import Tuple, List, Dict
 
 from . import sizes
@@ -38,6 +41,36 @@ from .utils import sortable_extracted_numbers
 debug = False
 
 
+def interned_dict(pairs):
+    """Create a dict with interned keys.
+
+    Every cell file repeats the same attribute names, interning them means
+    only one copy of each name is kept in memory.
+
+    >>> a = interned_dict([("".join(["tim", "ing"]), 1)])
+    >>> b = interned_dict([("".join(["ti", "ming"]), 2)])
+    >>> list(a)[0] is list(b)[0]
+    True
+    """
+    return {sys.intern(k): v for k, v in pairs}
+
+
+# orjson is much faster at parsing the large cell timing files, but is
+# optional. It already shares the key strings between objects it decodes.
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    def json_loads(s):
+        return json.loads(s, object_pairs_hook=interned_dict)
+
+
+# Cache of TimingType.names() / TimingType.describe() output keyed by int
+# value.
+_NAMES_CACHE = {}
+_DESCRIBE_CACHE = {}
+
+
 class TimingType(enum.IntFlag):
     """
 
@@ -53,6 +86,9 @@ class TimingType(enum.IntFlag):
     >>> TimingType.parse("ff_100C_1v65_pwrlkg")
     ('ff_100C_1v65', <TimingType.leakage: 4>)
 
+    >>> TimingType.parse("ccsnoise")
+    ('ccsnoise', <TimingType.basic: 1>)
+
     >>> (TimingType.basic).describe()
     ''
     >>> (TimingType.ccsnoise).describe()
@@ -79,21 +115,31 @@ class TimingType(enum.IntFlag):
     leakage  = 4
 
     def names(self):
-        o = []
-        for t in TimingType:
-            if t in self:
-                o.append(t.name)
-        return ", ".join(o)
+        key = int(self)
+        s = _NAMES_CACHE.get(key)
+        if s is None:
+            # Iterating over the members directly (rather than TimingType)
+            # includes the multi-bit members like ccsnoise.
+            s = ", ".join(
+                t.name for t in TimingType.__members__.values() if t in self)
+            _NAMES_CACHE[key] = s
+        return s
 
     def describe(self):
-        o = []
-        if TimingType.ccsnoise in self:
-            o.append("ccsnoise")
-        if TimingType.leakage in self:
-            o.append("power leakage")
-        if not o:
-            return ""
-        return "(with "+" and ".join(o)+")"
+        key = int(self)
+        s = _DESCRIBE_CACHE.get(key)
+        if s is None:
+            o = []
+            if TimingType.ccsnoise in self:
+                o.append("ccsnoise")
+            if TimingType.leakage in self:
+                o.append("power leakage")
+            if not o:
+                s = ""
+            else:
+                s = "(with "+" and ".join(o)+")"
+            _DESCRIBE_CACHE[key] = s
+        return s
 
     @property
     def file(self):
@@ -105,14 +151,11 @@ class TimingType(enum.IntFlag):
 
     @classmethod
     def parse(cls, name):
-        ttype = TimingType.basic
-        if name.endswith("_ccsnoise"):
-            name = name[:-len("_ccsnoise")]
-            ttype = TimingType.ccsnoise
-        elif name.endswith("_pwrlkg"):
-            name = name[:-len("_pwrlkg")]
-            ttype = TimingType.leakage
-        return name, ttype
+        head, sep, suffix = name.rpartition("_")
+        ttype = TIMING_TYPE_SUFFIXES.get(suffix)
+        if sep and ttype is not None:
+            return head, ttype
+        return name, TimingType.basic
 
     @property
     def singular(self):
@@ -120,12 +163,32 @@ class TimingType(enum.IntFlag):
 
     @property
     def types(self):
-        tt = set(t for t in TimingType if t in self)
+        tt = set(t for t in TimingType.__members__.values() if t in self)
         if TimingType.ccsnoise in tt:
             tt.remove(TimingType.basic)
         return list(tt)
 
 
+TIMING_TYPE_SUFFIXES = {
+    "ccsnoise": TimingType.ccsnoise,
+    "pwrlkg":   TimingType.leakage,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def cell_without_size(cell_with_size):
+    """
+
+    >>> cell_without_size("a2111o_1")
+    'a2111o'
+    >>> cell_without_size("a2111o")
+    'a2111o'
+    """
+    sz = sizes.parse_size(cell_with_size)
+    if sz:
+        return cell_with_size[:-len(sz.suffix)]
+    return cell_with_size
+
 
 def cell_corner_file(lib, cell_with_size, corner, corner_type: TimingType):
     """
@@ -140,12 +203,7 @@ def cell_corner_file(lib, cell_with_size, corner, corner_type: TimingType):
     """
     assert corner_type.singular, (lib, cell_with_size, corner, corner_type, corner_type.types())
 
-    sz = sizes.parse_size(cell_with_size)
-    if sz:
-        cell = cell_with_size[:-len(sz.suffix)]
-    else:
-        cell = cell_with_size
-
+    cell = cell_without_size(cell_with_size)
     fname = "cells/{cell}/{lib}__{cell_sz}__{corner}{corner_type}.lib.json".format(
         lib=lib, cell=cell, cell_sz=cell_with_size, corner=corner, corner_type=corner_type.file)
     return fname
@@ -166,6 +224,20 @@ def top_corner_file(libname, corner, corner_type: TimingType):
         corner=corner, corner_type=corner_type.file)
 
 
+def _scan_lib_json(path):
+    """Recursively yield the `os.DirEntry` for each `.lib.json` file under path.
+
+    `os.scandir` caches the file type information, so this avoids the extra
+    `stat()` calls made by `pathlib.Path.rglob` + `Path.is_file`.
+    """
+    with os.scandir(path) as it:
+        for e in it:
+            if e.is_dir(follow_symlinks=False):
+                yield from _scan_lib_json(e.path)
+            elif e.name.endswith(".lib.json") and e.is_file():
+                yield e
+
+
 def collect(library_dir) -> Tuple[Dict[str, TimingType], List[str]]:
     """Collect the available timing information in corners.
 
@@ -193,13 +265,14 @@ def collect(library_dir) -> Tuple[Dict[str, TimingType], List[str]]:
 
     corners = {}
     all_cells = set()
-    for p in library_dir.rglob("*.lib.json"):
-        if not p.is_file():
-            continue
-        if "timing" in str(p):
+    cell_files = set()
+    for e in _scan_lib_json(library_dir):
+        if "timing" in e.path:
             continue
 
-        fname, fext = str(p.name).split('.', 1)
+        if debug:
+            cell_files.add(os.path.relpath(e.path, library_dir))
+        fname, fext = e.name.split('.', 1)
 
         libname, cellname, corner = fname.split("__")
         if libname0 is None:
@@ -215,97 +288,143 @@ def collect(library_dir) -> Tuple[Dict[str, TimingType], List[str]]:
         corners[corner_name][1].add(cellname)
         all_cells.add(cellname)
 
-    for c in corners:
-        corners[c] = (corners[c][0], list(sorted(corners[c][1])))
-
     assert corners, library_dir
     assert all_cells, library_dir
     assert libname0, library_dir
 
+    # Sort the cells once, the per corner lists are filtered from it.
     all_cells = list(sorted(all_cells))
+    for c in corners:
+        corner_type, corner_cells = corners[c]
+        if len(corner_cells) == len(all_cells):
+            corners[c] = (corner_type, list(all_cells))
+        else:
+            corners[c] = (corner_type, [cell for cell in all_cells if cell in corner_cells])
 
     # Sanity check to make sure the corner exists for all cells.
     for corner, (corner_types, corner_cells) in sorted(corners.items()):
-        missing = set()
-        for cell_with_size in all_cells:
-            if cell_with_size not in corner_cells:
-                missing.add(cell_with_size)
-
+        missing = set(all_cells).difference(corner_cells)
         if not missing:
             continue
 
         print("Missing", ", ".join(missing), "from", corner, corner_types)
 
+    if debug:
+        # Sanity check to make sure each corner type has a file for every
+        # cell and a top level file. Compare against the directory listings
+        # rather than checking each file exists.
+        timing_dir = os.path.join(library_dir, "timing")
+        assert os.path.exists(timing_dir), timing_dir
+        with os.scandir(timing_dir) as it:
+            timing_files = set(e.name for e in it)
+
+        for corner, (corner_types, corner_cells) in sorted(corners.items()):
+            for corner_type in corner_types.types:
+                for cell_with_size in corner_cells:
+                    fname = cell_corner_file(libname0, cell_with_size, corner, corner_type)
+                    if os.path.normpath(fname) not in cell_files:
+                        print("Missing", (fname, corner, corner_type, corner_types))
+
+                fname = top_corner_file(libname0, corner, corner_type)
+                if os.path.basename(fname) not in timing_files:
+                    print("Missing", (fname, corner, corner_type, corner_types))
+
     return libname0, corners, all_cells
 
-    for corner, (corner_types, corner_cells) in sorted(corners.items()):
-        for corner_type in corner_types.types:
-            fname = cell_corner_file(libname0, cell_with_size, corner, corner_type)
-            fpath = os.path.join(library_dir, fname)
-            if not os.path.exists(fpath) and debug:
-                print("Missing", (fpath, corner, corner_type, corner_types))
-
-    timing_dir = os.path.join(library_dir, "timing")
-    assert os.path.exists(timing_dir), timing_dir
-    for corner, (corner_types, corner_cells) in sorted(corners.items()):
-        for corner_type in corner_types.types:
-            fname = top_corner_file(libname0, corner, corner_type)
-            fpath = os.path.join(library_dir, fname)
-            if not os.path.exists(fpath) and debug:
-                print("Missing", (fpath, corner, corner_type, corner_types))
 
-    return libname0, corners, all_cells
+def without_ccsn(d):
+    """Return a copy of d without the 'ccsn_' attributes.
+
+    >>> without_ccsn({"ccsn_first_stage": {}, "direction": "input"})
+    {'direction': 'input'}
+    """
+    return {k: v for k, v in d.items() if not k.startswith("ccsn_")}
+
+
+def has_ccsn(d):
+    return any(k.startswith("ccsn_") for k in d)
 
 
 def remove_ccsnoise(data, cellname):
-    for k, v in list(data.items()):
-        if "ccsn_" in k:
-            del data[k]
-            continue
+    """Remove the ccsnoise information from data (in place).
+
+    >>> data = {
+    ...     "ccsn_x": 1,
+    ...     "area": 2.0,
+    ...     "pin A": {"input_voltage": "x", "ccsn_first_stage": {}, "timing": [
+    ...         {"ccsn_last_stage": {}, "related_pin": "B"},
+    ...     ]},
+    ... }
+    >>> remove_ccsnoise(data, "cell")
+    >>> data
+    {'area': 2.0, 'pin A': {'timing': [{'related_pin': 'B'}]}}
+    """
+    for k in [k for k in data if "ccsn_" in k]:
+        del data[k]
 
+    for k, pin_data in data.items():
         if not k.startswith("pin "):
             continue
 
-        pin_data = data[k]
-
-        if "input_voltage" in pin_data:
-            del pin_data["input_voltage"]
-
-        ccsn_keys = set()
-        for pk in pin_data:
-            if not pk.startswith("ccsn_"):
-                continue
-            ccsn_keys.add(pk)
+        pin_data.pop("input_voltage", None)
 
-        for pk in ccsn_keys:
+        if has_ccsn(pin_data):
             if debug:
-                print("{:20s} - {:15s}: Removing {}".format(cellname, k, pk))
-            del pin_data[pk]
+                for pk in pin_data:
+                    if pk.startswith("ccsn_"):
+                        print("{:20s} - {:15s}: Removing {}".format(cellname, k, pk))
+            data[k] = pin_data = without_ccsn(pin_data)
 
         if "timing" not in pin_data:
             continue
         pin_timing = pin_data["timing"]
 
-        for i,t in enumerate(pin_timing):
-            ccsn_keys = set()
-            for tk in t:
-                if not tk.startswith("ccsn_"):
-                    continue
-                ccsn_keys.add(tk)
+        for i, t in enumerate(pin_timing):
+            if not has_ccsn(t):
+                continue
+            if debug:
+                for tk in t:
+                    if tk.startswith("ccsn_"):
+                        print("{:20s} - {:15s}.timing[{:3d}]: Removing {}".format(cellname, k, i, tk))
+            pin_timing[i] = without_ccsn(t)
+
+
+def load_json(fpath):
+    with open(fpath, "rb") as f:
+        return json_loads(f.read())
+
+
+# Parsing holds the GIL (both orjson and json), so more threads would only
+# buffer more parsed cells without adding any parallelism.
+PREFETCH_AHEAD = 2
 
-            for tk in ccsn_keys:
-                if debug:
-                    print("{:20s} - {:15s}.timing[{:3d}]: Removing {}".format(cellname, k, i, tk))
-                del t[tk]
 
+def prefetch(func, items, ahead=PREFETCH_AHEAD):
+    """Yield func(i) for each of items (in order), running up to `ahead`
+    calls in background threads.
 
-def generate(library_dir, lib, corner, ocorner_type, icorner_type, cells):
+    At most `ahead`+1 results are held at once.
+
+    >>> list(prefetch(lambda i: i*2, range(5), ahead=2))
+    [0, 2, 4, 6, 8]
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=ahead) as executor:
+        pending = collections.deque()
+        for i in items:
+            pending.append(executor.submit(func, i))
+            if len(pending) > ahead:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def generate(library_dir, lib, corner, ocorner_type, icorner_type, cells, prefetch_ahead=PREFETCH_AHEAD):
     top_fname = top_corner_file(lib, corner, ocorner_type).replace('.lib.json', '.lib')
     top_fpath = os.path.join(library_dir, top_fname)
 
-    top_fout = open(top_fpath, "w")
+    top_fout = open(top_fpath, "w", buffering=1<<20)
     def top_write(lines):
-        print("\n".join(lines), file=top_fout)
+        top_fout.writelines(l+'\n' for l in lines)
 
     otype_str = "({} from {})".format(ocorner_type.name, icorner_type.names())
     print("Starting to write", top_fpath, otype_str, flush=True)
@@ -314,45 +433,49 @@ def generate(library_dir, lib, corner, ocorner_type, icorner_type, cells):
 
     common_data_path = os.path.join(library_dir, "timing", "{}__common.lib.json".format(lib))
     assert os.path.exists(common_data_path), common_data_path
-    with open(common_data_path) as f:
-        d = json.load(f)
-        assert isinstance(d, dict)
-        for k, v in d.items():
-            assert k not in common_data, (k, common_data[k])
-            common_data[k] = v
+    d = load_json(common_data_path)
+    assert isinstance(d, dict)
+    for k, v in d.items():
+        assert k not in common_data, (k, common_data[k])
+        common_data[k] = v
 
     top_data_path = os.path.join(library_dir, top_corner_file(lib, corner, icorner_type))
     assert os.path.exists(top_data_path), top_data_path
-    with open(top_data_path) as f:
-        d = json.load(f)
-        assert isinstance(d, dict)
-        for k, v in d.items():
-            if k in common_data:
-                print("Overwriting", k, "with", v, "(existing value of", common_data[k], ")")
-            common_data[k] = v
+    d = load_json(top_data_path)
+    assert isinstance(d, dict)
+    for k, v in d.items():
+        if k in common_data:
+            print("Overwriting", k, "with", v, "(existing value of", common_data[k], ")")
+        common_data[k] = v
 
     # Remove the ccsnoise if it exists
     if ocorner_type != TimingType.ccsnoise:
         remove_ccsnoise(common_data, "library")
 
+    # Write everything but the closing '}' of the library, the cells go
+    # inside it.
     output = liberty_dict("library", lib+"__"+corner, common_data)
-    assert output[-1] == '}', output
-    top_write(output[:-1])
-
-    for cell_with_size in cells:
+    last = next(output)
+    for l in output:
+        top_fout.write(last+'\n')
+        last = l
+    assert last == '}', last
+
+    # Read and parse the cell files in the background while the previous
+    # cells are being written out.
+    def load_cell(cell_with_size):
         fname = cell_corner_file(lib, cell_with_size, corner, icorner_type)
         fpath = os.path.join(library_dir, fname)
         assert os.path.exists(fpath), fpath
+        return cell_with_size, load_json(fpath)
 
-        with open(fpath) as f:
-            cell_data = json.load(f)
-
+    for cell_with_size, cell_data in prefetch(load_cell, cells, prefetch_ahead):
         # Remove the ccsnoise if it exists
         if ocorner_type != TimingType.ccsnoise:
             remove_ccsnoise(cell_data, cell_with_size)
 
         top_write([''])
-        top_write(liberty_dict("cell", "%s__%s" % (lib, cell_with_size), cell_data, [cell_with_size]))
+        top_write(liberty_dict("cell", "%s__%s" % (lib, cell_with_size), cell_data, INDENT))
 
     top_write([''])
     top_write(['}'])
@@ -475,17 +598,39 @@ RE_LIBERTY_LIST = re.compile("(.*)_([0-9]+)")
 RE_NUMBERS = re.compile('([0-9]+)')
 
 
+def _attribute_positions(template):
+    """Map every name `_lookup_attribute_pos` can match to its position.
+
+    A name matches the first word in the template which it is a prefix of
+    (the position is that of the space before the word). Names ending in
+    '_' only match a whole word which is followed by a space.
+
+    >>> pos = _attribute_positions(" ab_ x\\n abc ab_cd")
+    >>> pos['ab'], pos['abc'], pos['ab_'], pos['ab_c']
+    (0.0, 7.0, 0.0, 11.0)
+    >>> 'a_' in _attribute_positions(" a_b a_\\n")
+    False
+    """
+    pos = {}
+    for m in re.finditer(' (\\S*)', template):
+        word = m.group(1)
+        followed_by_space = template.startswith(' ', m.end())
+        for j in range(len(word)+1):
+            prefix = word[:j]
+            if prefix.endswith('_') and not (j == len(word) and followed_by_space):
+                continue
+            pos.setdefault(prefix, float(m.start()))
+    return pos
+
+
+LIBERTY_ATTRIBUTE_POS = _attribute_positions(LIBERTY_ATTRIBUTE_ORDER)
+
+
 def _lookup_attribute_pos(name):
-    # Pad with spaces so you don't get substring matches.
-    name = ' ' + name
-    if name.endswith('_'):
-        name = name + ' '
-    i = LIBERTY_ATTRIBUTE_ORDER.find(name)
-    if i != -1:
-        return float(i)
-    return None
+    return LIBERTY_ATTRIBUTE_POS.get(name)
 
 
+@functools.lru_cache(maxsize=None)
 def liberty_attribute_order(attr_name):
     """
 
@@ -594,6 +739,9 @@ def is_liberty_list(k):
     return k in ('variable', 'index', 'values')
 
 
+LIBERTY_FLOAT_WIDTH = len(str(0.0083333333))
+
+
 def liberty_float(f):
     """
 
@@ -609,45 +757,46 @@ def liberty_float(f):
     >>> liberty_float(1)
     '1.0000000000'
 
+    >>> liberty_float(12345678901234)
+    '12345678901234'
+
     """
-    WIDTH = len(str(0.0083333333))
+    if type(f) is int or (type(f) is float and math.isfinite(f)):
+        s = repr(f)
+    else:
+        s = json.dumps(f)
 
-    s = json.dumps(f)
     if 'e' in s:
         a, b = s.split('e')
         if '.' not in a:
             a += '.'
-        while len(a)+len(b)+1 < WIDTH:
-            a += '0'
-        s = "%se%s" % (a, b)
-    elif '.' in s:
-        while len(s) < WIDTH:
-            s += '0'
-    else:
-        if len(s) < WIDTH:
-            s += '.'
-        while len(s) < WIDTH:
-            s += '0'
-    return s
+        return "%se%s" % (a.ljust(LIBERTY_FLOAT_WIDTH-len(b)-1, '0'), b)
+
+    if '.' not in s and len(s) < LIBERTY_FLOAT_WIDTH:
+        s += '.'
+    return s.ljust(LIBERTY_FLOAT_WIDTH, '0')
 
 
 INDENT="    "
 
 
-def liberty_composite(k, v, i=tuple()):
+def liberty_composite(k, v, indent=""):
     """
 
     >>> def pl(l):
     ...     print("\\n".join(l))
 
-    >>> pl(liberty_composite("capacitive_load_unit", [1.0, "pf"], []))
+    >>> pl(liberty_composite("capacitive_load_unit", [1.0, "pf"]))
     capacitive_load_unit(1.0000000000, "pf");
 
-    >>> pl(liberty_composite("voltage_map", [("vpwr", 1.95), ("vss", 0.0)], []))
+    >>> pl(liberty_composite("voltage_map", [("vpwr", 1.95), ("vss", 0.0)]))
     voltage_map("vpwr", 1.9500000000);
     voltage_map("vss", 0.0000000000);
 
-    >>> pl(liberty_composite("library_features", 'report_delay_calculation', []))
+    >>> pl(liberty_composite("voltage_map", ["vss", 0.0], INDENT))
+        voltage_map("vss", 0.0000000000);
+
+    >>> pl(liberty_composite("library_features", 'report_delay_calculation'))
     library_features("report_delay_calculation");
 
     """
@@ -658,10 +807,9 @@ def liberty_composite(k, v, i=tuple()):
     #assert isinstance(v, list), (k, v)
 
     if isinstance(v[0], (list, tuple)):
-        o = []
         for j, l in enumerate(v):
-            o.extend(liberty_composite(k, l, i))
-        return o
+            yield from liberty_composite(k, l, indent)
+        return
 
     o = []
     for l in v:
@@ -673,7 +821,7 @@ def liberty_composite(k, v, i=tuple()):
         else:
             raise ValueError("%s - %r (%r)" % (k, l, v))
 
-    return ["%s%s(%s);" % (INDENT*len(i), k, ", ".join(o))]
+    yield f"{indent}{k}({', '.join(o)});"
 
 
 def liberty_join(l):
@@ -687,138 +835,163 @@ def liberty_join(l):
     >>> liberty_join(l)(l)
     '1, 5, 8'
 
-    """
-    d = defaultdict(lambda: 0)
-
-    for i in l:
-        d[type(i)] += 1
+    >>> l = [1.0, "a"]
+    >>> liberty_join(l)(l)
+    Traceback (most recent call last):
+      ...
+    AssertionError: [(1.0, <class 'float'>), ('a', <class 'str'>)]
 
+    """
     def types(l):
         return [(i, type(i)) for i in l]
 
-    if d[float] > 0:
-        assert (d[float]+d[int]) == len(l), (d, types(l))
+    # Rows are almost always all floats, so only look at the first value
+    # unless it is an int (which could be followed by floats).
+    t = type(l[0])
+    if t is float or (t is int and float in map(type, l)):
+        if __debug__:
+            assert all(type(i) in (float, int) for i in l), types(l)
         def join(l):
-            return ", ".join(liberty_float(f) for f in l)
+            return ", ".join(map(liberty_float, l))
         return join
 
-    elif d[int] > 0:
-        assert d[int] == len(l), (d, types(l))
+    elif t is int:
+        if __debug__:
+            assert all(type(i) is int for i in l), types(l)
         def join(l):
-            return ", ".join(str(f) for f in l)
+            return ", ".join(map(str, l))
         return join
 
     raise ValueError("Invalid value: %r" % types(l))
 
 
-def liberty_list(k, v, i=tuple()):
-    o = []
+def liberty_list(k, v, indent=""):
+    """
+
+    >>> def pl(l):
+    ...     print("\\n".join(l))
+
+    >>> pl(liberty_list("index_1", [1.0, 2.0]))
+    index_1("1.0000000000, 2.0000000000");
+
+    >>> pl(liberty_list("values", [[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]]))
+    values("1.0000000000, 2.0000000000", \\
+        "3.0000000000, 4.0000000000", \\
+        "5.0000000000, 6.0000000000");
+
+    >>> pl(liberty_list("values", [[1.0, 2.0]]))
+    values("1.0000000000, 2.0000000000");
+
+    """
     if isinstance(v[0], list):
-        o.append('%s%s(' % (INDENT*len(i), k))
         join = liberty_join(v[0])
-        for l in v:
-            o.append('%s"%s", \\' % (INDENT*(len(i)+1), join(l)))
+        row_indent = indent+INDENT
+        last = len(v)-1
+        for j, l in enumerate(v):
+            if j == 0:
+                start = f'{indent}{k}('
+            else:
+                start = row_indent
+            if j == last:
+                end = ');'
+            else:
+                end = ', \\'
+            yield f'{start}"{join(l)}"{end}'
+    else:
+        join = liberty_join(v)
+        yield f'{indent}{k}("{join(v)}");'
+
+
+def liberty_attr_sort_key(item):
+    """Sort key for the (key, value) attribute items of a liberty group.
 
-        o0 = o.pop(0)
-        o[0] = o0+o[0].lstrip()
+    >>> items = [("pin Y", {}), ("area", 1.0), ("pin A10", {}), ("pin A2", {})]
+    >>> [k for k, v in sorted(items, key=liberty_attr_sort_key)]
+    ['area', 'pin A2', 'pin A10', 'pin Y']
+    """
+    k = item[0]
+    ktype, _, kvalue = k.partition(" ")
+    if kvalue:
+        sortable_kv = sortable_extracted_numbers(kvalue)
+    else:
+        sortable_kv = ()
 
-        o[-1] = o[-1][:-3] + ');'
+    if ktype == "comp_attribute":
+        sortable_kt = liberty_attribute_order(kvalue)
     else:
-        join = liberty_join(v)
-        o.append('%s%s("%s");' % (INDENT*len(i), k, join(v)))
+        sortable_kt = liberty_attribute_order(ktype)
 
-    return o
+    return sortable_kt, ktype, sortable_kv, kvalue, k
 
 
-def liberty_dict(dtype, dvalue, data, indent=tuple()):
+def liberty_dict(dtype, dvalue, data, indent=""):
     assert isinstance(data, dict), (dtype, dvalue, data)
-    o = []
 
     if dvalue:
         dbits = dvalue.split(",")
         for j, d in enumerate(dbits):
             if '"' in d:
-                assert d.startswith('"'), (dvalue, dbits, indent)
-                assert d.endswith('"'), (dvalue, dbits, indent)
+                assert d.startswith('"'), (dtype, dvalue, dbits)
+                assert d.endswith('"'), (dtype, dvalue, dbits)
                 dbits[j] = d[1:-1]
         dvalue = ','.join('"%s"' % d.strip() for d in dbits)
-    o.append('%s%s (%s) {' % (INDENT*len(indent), dtype, dvalue))
+    attr_indent = indent+INDENT
+    yield f'{indent}{dtype} ({dvalue}) {{'
 
     # Sort the attributes
-    def attr_sort_key(item):
-        k, v = item
-        if " " in k:
-            ktype, kvalue = k.split(" ", 1)
-            sortable_kv = sortable_extracted_numbers(kvalue)
-        else:
-            ktype = k
-            kvalue = ""
-            sortable_kv = tuple()
-
-        if ktype == "comp_attribute":
-            sortable_kt = liberty_attribute_order(kvalue)
-        else:
-            sortable_kt = liberty_attribute_order(ktype)
-
-        return sortable_kt, ktype, sortable_kv, kvalue, k, v
-
-    di = [attr_sort_key(i) for i in data.items()]
-    di.sort()
+    di = sorted(data.items(), key=liberty_attr_sort_key)
     if debug:
-        for sk, kt, skv, kv, k, v in di:
-            print(str(indent), "%4.0f %4.0f -- " % sk, "%-40s" % kt, '%-40r' % kv, str(v)[:40], '...')
+        for i in di:
+            sk, kt, skv, kv, k = liberty_attr_sort_key(i)
+            print(dtype, dvalue, "%4.0f %4.0f -- " % sk, "%-40s" % kt, '%-40r' % kv, str(i[1])[:40], '...')
 
     # Output all the attributes
-    for _, ktype, _, kvalue, k, v in di:
-        indent_n = list(indent)+[k]
+    for k, v in di:
+        ktype, _, kvalue = k.partition(" ")
 
         if ktype == 'define':
             for d in sorted(data['define'], key=lambda d: d['group_name']+'.'+d['attribute_name']):
-                o.append('%sdefine(%s,%s,%s);' % (
-                    INDENT*len(indent_n),
-                    d['attribute_name'],
-                    d['group_name'],
-                    d['attribute_type']),
-                )
+                yield f"{attr_indent}define({d['attribute_name']},{d['group_name']},{d['attribute_type']});"
 
         elif ktype == "comp_attribute":
-            o.extend(liberty_composite(kvalue, v, indent_n))
+            yield from liberty_composite(kvalue, v, attr_indent)
 
         elif isinstance(v, dict):
             assert isinstance(v, dict), (dtype, dvalue, k, v)
-            o.extend(liberty_dict(ktype, kvalue, v, indent_n))
+            yield from liberty_dict(ktype, kvalue, v, attr_indent)
 
         elif isinstance(v, list):
             assert len(v) > 0, (dtype, dvalue, k, v)
             if isinstance(v[0], dict):
-                def sk(o):
-                    return o.items()
-
-                for l in sorted(v, key=sk):
-                    o.extend(liberty_dict(ktype, kvalue, l, indent_n))
+                for l in sorted(v, key=dict.items):
+                    yield from liberty_dict(ktype, kvalue, l, attr_indent)
 
             elif is_liberty_list(ktype):
-                o.extend(liberty_list(ktype, v, indent_n))
+                yield from liberty_list(ktype, v, attr_indent)
 
             elif "clk_width" == ktype:
                 for l in sorted(v):
-                    o.append("%s%s : %s;" % (INDENT*len(indent_n), k, l))
+                    yield f"{attr_indent}{k} : {l};"
 
             else:
-                raise ValueError("Unknown %s: %r\n%s" % (k, v, indent_n))
+                raise ValueError("Unknown %s: %r\n%s %s" % (k, v, dtype, dvalue))
 
         else:
             if isinstance(v, str):
                 v = '"%s"' % v
             elif isinstance(v, (float,int)):
                 v = liberty_float(v)
-            o.append("%s%s : %s;" % (INDENT*len(indent_n), k, v))
+            yield f"{attr_indent}{k} : {v};"
+
+    yield f"{indent}}}"
 
-    o.append("%s}" % (INDENT*len(indent)))
-    return o
 
 
 
+def set_debug(value):
+    global debug
+    debug = value
+
 
 def main():
     parser = argparse.ArgumentParser()
@@ -848,11 +1021,15 @@ def main():
             help="Include verbose debug output on the console.",
             action='store_true',
             default=False)
+    parser.add_argument(
+            "-j", "--jobs",
+            help="Number of corners to generate in parallel (default: number of CPUs).",
+            type=int,
+            default=None)
 
     args = parser.parse_args()
     if args.debug:
-        global debug
-        debug = True
+        set_debug(True)
 
     libdir = args.library_path[0]
 
@@ -890,6 +1067,7 @@ def main():
 
     print("Generating", output_corner_type.name, "liberty timing files for", lib, "at", ", ".join(args.corner))
     print()
+    generate_args = []
     for corner in args.corner:
         input_corner_type, corner_cells = corners[corner]
         if output_corner_type not in input_corner_type:
@@ -901,11 +1079,25 @@ def main():
         else:
             input_corner_type = output_corner_type
 
-        generate(
+        generate_args.append((
             libdir, lib,
             corner, output_corner_type, input_corner_type,
             corner_cells,
-        )
+        ))
+
+    # Each corner is written to its own file, so they can be generated in
+    # parallel. Split the CPUs between the workers' prefetch threads so at
+    # most jobs*(ahead+1) parsed cells are in memory at once.
+    cpus = os.cpu_count() or 1
+    jobs = min(args.jobs or cpus, len(generate_args))
+    ahead = max(1, min(PREFETCH_AHEAD, cpus // max(jobs, 1)))
+    generate_args = [a + (ahead,) for a in generate_args]
+    if jobs <= 1:
+        for a in generate_args:
+            generate(*a)
+    else:
+        with multiprocessing.Pool(jobs, initializer=set_debug, initargs=(debug,)) as pool:
+            pool.starmap(generate, generate_args)
     return 0
 
 